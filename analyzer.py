@@ -7,41 +7,48 @@ Pipeline:
   3. Send formatted JSON to Gemini to generate a Markdown summary/ranking.
 """
 
-import json
+import functools
+import hashlib
 import re
 from typing import Callable
+import orjson
 import pandas as pd
-from dotenv import load_dotenv
-
-load_dotenv()
 
 # ---------------------------------------------------------------------------
 # Text Cleaning
 # ---------------------------------------------------------------------------
 
+_HTML_RE = re.compile(r'<[^>]+>')
+_WS_RE = re.compile(r'\s+')
+# Common emoji / pictograph blocks plus variation selectors and ZWJ.
+# Unlike an ASCII round-trip this keeps Polish diacritics intact.
+_EMOJI_RE = re.compile(
+    "["
+    "\U0001F000-\U0001FAFF"  # mahjong, cards, pictographs, emoticons, transport, ...
+    "\U00002600-\U000027BF"  # misc symbols, dingbats
+    "\U0000FE0E-\U0000FE0F"  # variation selectors
+    "\U0000200D"              # zero-width joiner
+    "]+"
+)
+
+
 def clean_text(text: str) -> str:
     """Remove HTML, newlines, extra whitespace, and emojis."""
     if not text:
         return ""
     # Remove HTML tags
-    text = re.sub(r'<[^>]+>', '', text)
+    text = _HTML_RE.sub('', text)
     # Remove URLs (optional, but usually good for "pure text")
     # text = re.sub(r'http\S+', '', text) 
-    # Replace newlines with space
-    text = re.sub(r'[\r\n]+', ' ', text)
-    # Normalize duplicate whitespace
-    text = re.sub(r'\s+', ' ', text)
-    
     # Remove emojis (basic range check)
     # This regex covers many common emoji ranges but not all. 
     # For a robust solution, 'emoji' library is better, but avoiding new deps if possible.
-    # Using a simple block range for now.
-    try:
-        # High surrogate pass for some emojis
-        text = text.encode('ascii', 'ignore').decode('ascii')
-    except:
-        pass
-    
+    text = _EMOJI_RE.sub('', text)
+    # Replace newlines and duplicate whitespace with a single space
+    # (\s already matches \r and \n, so one pass covers both; running it
+    # after emoji removal also collapses the gaps they leave behind)
+    text = _WS_RE.sub(' ', text)
+
     return text.strip()
 
 # ---------------------------------------------------------------------------
@@ -65,40 +72,77 @@ Nie używaj tagów XML, nie zwracaj JSON. Zwróć czysty tekst Markdown.
 Piszesz po polsku.
 """
 
-def _build_summary_prompt(posts: list[dict], user_instructions: str) -> str:
+def _build_summary_prompt(posts: list[dict], cleaned_texts: list[str], user_instructions: str) -> str:
+    """Render deduplicated posts and their parallel cleaned texts into the user prompt."""
     lines = [
         "Oto dane z grupy Facebook (posty i komentarze):",
         "```json"
     ]
-    # Minimize JSON to save tokens
-    clean_posts = []
-    for p in posts:
-        clean_posts.append({
-            "text": clean_text(p.get("text", "")),
+    # Minimize JSON to save tokens; posts arrive already cleaned by
+    # process_and_summarize, so serialize them directly without a second
+    # clean_text pass or an intermediate list of dicts
+    payload = b",".join(
+        orjson.dumps({
+            "text": text,
             "reactions": p.get("reactions", 0),
             "comments": p.get("comments", 0)
         })
-    
-    lines.append(json.dumps(clean_posts, ensure_ascii=False))
+        for p, text in zip(posts, cleaned_texts)
+    )
+    lines.append("[" + payload.decode() + "]")
     lines.append("```")
     lines.append(f"\nInstrukcje dodatkowe: {user_instructions}")
     
     return "\n".join(lines)
 
 
-def _call_gemini_summary(posts: list[dict], user_instructions: str, api_key: str, model: str, log: Callable) -> str:
+# Successful summaries keyed by a digest of (model, system prompt, prompt), so
+# re-running on the same posts with the same instructions skips the API call.
+_SUMMARY_CACHE: dict[bytes, str] = {}
+_SUMMARY_CACHE_SIZE = 32
+
+
+def _summary_cache_key(model: str, system_prompt: str, prompt: str) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    for part in (model, system_prompt, prompt):
+        h.update(part.encode())
+        h.update(b"\0")
+    return h.digest()
+
+
+@functools.lru_cache(maxsize=4)
+def _get_client(api_key: str):
+    """Return a Gemini client for this key, reused across runs (keeps its HTTP pool warm)."""
+    from google import genai
+
+    return genai.Client(api_key=api_key)
+
+
+def _call_gemini_summary(
+    posts: list[dict],
+    cleaned_texts: list[str],
+    user_instructions: str,
+    api_key: str,
+    model: str,
+    log: Callable,
+) -> str:
     """
     Send all posts to Gemini to generate one big summary.
     """
-    from google import genai
+    prompt = _build_summary_prompt(posts, cleaned_texts, user_instructions)
+    formatted_system_prompt = _SYSTEM_PROMPT.format(user_instructions=user_instructions)
+
+    cache_key = _summary_cache_key(model, formatted_system_prompt, prompt)
+    cached = _SUMMARY_CACHE.get(cache_key)
+    if cached is not None:
+        log("  ♻️ Same posts and instructions as a previous run — reusing cached summary.")
+        return cached
+
     from google.genai import types
 
-    client = genai.Client(api_key=api_key)
-    prompt = _build_summary_prompt(posts, user_instructions)
+    client = _get_client(api_key)
     log(f"  📤 Sending {len(posts)} posts to Gemini (approx {len(prompt)//4} tokens)...")
 
-    formatted_system_prompt = _SYSTEM_PROMPT.format(user_instructions=user_instructions)
-
     try:
         response = client.models.generate_content(
             model=model,
@@ -108,7 +152,12 @@ def _call_gemini_summary(posts: list[dict], user_instructions: str, api_key: str
                 temperature=0.3,
             ),
         )
-        return response.text.strip()
+        summary = response.text.strip()
+        if len(_SUMMARY_CACHE) >= _SUMMARY_CACHE_SIZE:
+            # Evict the oldest entry (dicts keep insertion order)
+            del _SUMMARY_CACHE[next(iter(_SUMMARY_CACHE))]
+        _SUMMARY_CACHE[cache_key] = summary
+        return summary
 
     except Exception as e:
         log(f"⚠️ Gemini error: {e}")
@@ -137,9 +186,10 @@ def process_and_summarize(
     log(f"🧹 Cleaning and deduplicating {len(posts)} posts...")
     
     # Deduplicate
-    seen_hashes = set()
-    deduped = []
-    import hashlib
+    seen_hashes: set[int] = set()
+    deduped: list[dict] = []
+    # Kept parallel to `deduped` so callers' post dicts are never mutated
+    cleaned_texts: list[str] = []
     
     for p in posts:
         # Clean text first
@@ -147,34 +197,34 @@ def process_and_summarize(
         if not cleaned_text:
             continue
             
-        norm = re.sub(r'\s+', ' ', cleaned_text).lower()
-        h = hashlib.md5(norm.encode()).hexdigest()
+        # clean_text already collapsed whitespace, only case-fold here
+        norm = cleaned_text.lower()
+        # 8-byte BLAKE2b digest kept as an int: cheaper than MD5 hex strings
+        h = int.from_bytes(hashlib.blake2b(norm.encode(), digest_size=8).digest(), "little")
         
         if h not in seen_hashes:
             seen_hashes.add(h)
-            # Store cleaned text back in the dict for the DF/LLM
-            p["cleaned_text"] = cleaned_text
             deduped.append(p)
+            cleaned_texts.append(cleaned_text)
 
     log(f"  → Result files: {len(deduped)} unique posts.")
 
     # Convert to DataFrame for export
     df = pd.DataFrame(deduped)
     if not df.empty:
-        # Reorder columns if possible
-        cols = ["cleaned_text", "reactions", "comments"]
-        # Add others if exist
-        for c in df.columns:
-            if c not in cols:
-                cols.append(c)
-        df = df[cols]
+        df.insert(0, "cleaned_text", cleaned_texts)
+        # Fixed columns first, then anything else the scraper provided.
+        # reindex fills missing counts with 0 instead of raising KeyError.
+        fixed = ["cleaned_text", "reactions", "comments"]
+        extras = df.columns.difference(fixed, sort=False).tolist()
+        df = df.reindex(columns=fixed + extras, fill_value=0)
 
     if not gemini_api_key:
         log("⚠️ No Gemini API key provided. Skipping LLM summary.")
         return "⚠️ Brak klucza API. Nie wygenerowano podsumowania.", df
 
     log("🤖 Generating summary with Gemini...")
-    summary = _call_gemini_summary(deduped, user_instructions, gemini_api_key, model, log)
+    summary = _call_gemini_summary(deduped, cleaned_texts, user_instructions, gemini_api_key, model, log)
     
     log("✅ Report generated.")
     return summary, df
@@ -6,16 +6,27 @@ Run with:
 Then open http://localhost:7860 in your browser.
 """
 
+import os
+
 import gradio as gr
 from dotenv import load_dotenv
 
 from app.core import pipeline
 from app.ui import layout
 
-load_dotenv()
-
 
 if __name__ == "__main__":
+    # Deployments that provide a real environment can skip parsing .env
+    if not os.getenv("FB_SCRAPER_NO_DOTENV"):
+        load_dotenv()
+
+    theme = gr.themes.Soft(
+        primary_hue="blue",
+        secondary_hue="slate",
+        neutral_hue="slate",
+        font=[gr.themes.GoogleFont("Inter"), "ui-sans-serif", "system-ui"],
+    )
+
     demo = layout.create_demo(
         run_pipeline_fn=pipeline.run_pipeline,
         clear_session_fn=pipeline.clear_session,
@@ -28,12 +39,6 @@ if __name__ == "__main__":
         server_port=7860,
         share=False,
         inbrowser=True,
-        css=layout.CUSTOM_CSS,
-        js=layout.CUSTOM_JS,
-        theme=gr.themes.Soft(
-            primary_hue="blue",
-            secondary_hue="slate",
-            neutral_hue="slate",
-            font=[gr.themes.GoogleFont("Inter"), "ui-sans-serif", "system-ui"],
-        ),
+        css_paths=[layout.CSS_PATH],
+        theme=theme,
     )
@@ -0,0 +1,43 @@
+"""
+Shared background executor.
+One lazily-created thread pool for short fire-and-forget work (history and
+preset saves), sized via the FB_SCRAPER_THREADS environment variable.
+"""
+
+import atexit
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+_executor: ThreadPoolExecutor | None = None
+_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the process-wide executor, creating it on first use."""
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=int(os.getenv("FB_SCRAPER_THREADS", "2")),
+                    thread_name_prefix="fb-scraper",
+                )
+                atexit.register(_executor.shutdown, wait=False)
+    return _executor
+
+
+def _log_failure(future: Future) -> None:
+    exc = future.exception()
+    if exc is not None:
+        logger.warning("Background task failed", exc_info=exc)
+
+
+def submit_bg(fn, *args, **kwargs) -> Future:
+    """Fire-and-forget: run fn on the shared executor, logging (not raising) errors."""
+    future = get_executor().submit(fn, *args, **kwargs)
+    future.add_done_callback(_log_failure)
+    return future
@@ -1,34 +1,49 @@
+import io
 import os
 import queue
+import re
 import tempfile
 import threading
-from concurrent.futures import ThreadPoolExecutor
+import time
 
 import gradio as gr
-import pandas as pd
 
 from analyzer import process_and_summarize
 from scraper import scrape_group_threaded
+from app.core.executor import submit_bg
 from app.persistence import (
     save_to_history,
     save_preset,
     DEFAULT_CRITERIA,
-    load_history,
-    load_presets,
     get_session_file_path,
     save_run,
 )
 
-_executor = ThreadPoolExecutor(max_workers=1)
 STOP_EVENT = threading.Event()
 
+# Shared "keep the export button hidden" update for every intermediate yield.
+# It carries no "value", so Gradio's postprocessing leaves it untouched.
+_EXPORT_HIDDEN = gr.update(visible=False)
+# "Leave this output as it is": the report and export button are reset once
+# when a run starts, so later log-only yields don't re-send them.
+_UNCHANGED = gr.skip()
+
+# Splits on commas and swallows the whitespace around them in one pass
+_KW_SPLIT_RE = re.compile(r"\s*,\s*")
+
+# Scraper logs arrive in bursts; push them to the UI at most every 50 ms
+# (or every 16 lines) instead of re-rendering once per line.
+_LOG_YIELD_INTERVAL = 0.05
+_LOG_YIELD_BATCH = 16
+_LOG_QUEUE_SIZE = 4096
+
 
 def parse_custom_keywords(raw: str) -> list[str]:
-    return [kw.strip() for kw in raw.split(",") if kw.strip()]
+    return [kw for kw in _KW_SPLIT_RE.split(raw.strip()) if kw]
 
 
-def stop_scraper():
-    """Signal the scraper to stop."""
+async def stop_scraper():
+    """Signal the scraper to stop (async: just sets an event, no thread needed)."""
     STOP_EVENT.set()
     return "🛑 Sygnał zatrzymania wysłany..."
 
@@ -41,17 +56,19 @@ def run_pipeline(
     save_session: bool,
     gemini_api_key: str,
     criteria_description: str,
-    custom_keywords_raw: str,
-    top_n: int,
     headless: bool,
     scroll_wait_ms: int,
     per_post_timeout: float,
     enrich_total_timeout: float,
     model: str,
+    *,
+    custom_keywords_raw: str = "",
+    top_n: int = 20,
 ):
     """
     Gradio generator: yields (log_text, results_df, export_btn_update) tuples.
-    The scraper runs in a background thread; we poll its log queue here.
+    The scraper runs in a background thread; this generator blocks on its log
+    queue and streams the lines to the UI in batches.
     """
     STOP_EVENT.clear()
 
@@ -67,38 +84,66 @@ def run_pipeline(
 
     # --- Validate ---
     if not group_url:
-        yield "❌ Proszę podać URL grupy Facebook.", None, gr.update(visible=False)
+        yield "❌ Proszę podać URL grupy Facebook.", None, _EXPORT_HIDDEN
         return
 
     input_email = email.strip()
     session_file_path = get_session_file_path(input_email)
+    has_session = session_file_path.exists()
 
-    if not input_email and not session_file_path.exists():
-        yield "❌ Proszę podać adres e-mail (lub upewnij się, że masz zapisaną sesję dla pustego emaila).", None, gr.update(visible=False)
+    if not input_email and not has_session:
+        yield "❌ Proszę podać adres e-mail (lub upewnij się, że masz zapisaną sesję dla pustego emaila).", None, _EXPORT_HIDDEN
         return
-    if not password.strip() and not session_file_path.exists():
-        yield "❌ Proszę podać hasło (lub upewnij się, że masz zapisaną sesję).", None, gr.update(visible=False)
+    if not password.strip() and not has_session:
+        yield "❌ Proszę podać hasło (lub upewnij się, że masz zapisaną sesję).", None, _EXPORT_HIDDEN
         return
 
-    # Save group to history before scraping
-    if group_url.strip():
-        save_to_history(group_url.strip())
+    # Save group to history and criteria/keywords presets before scraping.
+    # Nothing reads them back during this run, so write in the background
+    # rather than delaying the scraper start on disk I/O.
+    def _remember_inputs():
+        save_to_history(group_url)
+        if criteria_description:
+            save_preset("criteria", criteria_description)
+        if custom_keywords_raw:
+            save_preset("keywords", custom_keywords_raw)
+
+    submit_bg(_remember_inputs)
 
-    # Save criteria and keywords presets
-    if criteria_description.strip():
-        save_preset("criteria", criteria_description.strip())
-    if custom_keywords_raw.strip():
-        save_preset("keywords", custom_keywords_raw.strip())
-    
     if not gemini_api_key.strip():
         gemini_api_key = os.getenv("GEMINI_API_KEY", "")
 
-    log_lines: list[str] = []
-    log_q: queue.Queue[str | None] = queue.Queue()
+    # Log text is grown incrementally; re-joining a list on every yield is O(N²)
+    log_buf = io.StringIO()
+
+    def add_log(msg: str) -> None:
+        if log_buf.tell():
+            log_buf.write("\n")
+        log_buf.write(msg)
+
+    def progress() -> tuple:
+        """Intermediate output: only the log changes."""
+        return log_buf.getvalue(), _UNCHANGED, _UNCHANGED
+
+    # Bounded so a scraper that outpaces the UI blocks instead of piling up lines
+    log_q: queue.Queue[str | None] = queue.Queue(maxsize=_LOG_QUEUE_SIZE)
     # Container for scraper result: [posts, group_name]
     result_holder: list[object] = [[], ""] 
 
+    # Exception raised by the scraper thread, re-raised on this side
+    scraper_error: list[Exception] = []
+
     def _run_scraper():
+        try:
+            _scrape()
+        except Exception as e:
+            scraper_error.append(e)
+        finally:
+            # The scraper pushes its own sentinel, but _scrape can return early
+            # (stop requested) or raise before it does; this one always arrives.
+            log_q.put(None)
+
+    def _scrape():
         if STOP_EVENT.is_set():
             return
 
@@ -123,80 +168,92 @@ def run_pipeline(
             save_to_history(group_url.strip(), group_name)
 
     # --- Launch scraper in background thread ---
-    log_lines.append("🚀 Rozpoczynam scrapowanie...")
-    yield "\n".join(log_lines), "", gr.update(visible=False)
+    add_log("🚀 Rozpoczynam scrapowanie...")
+    # Clear the previous run's report and hide its export
+    yield log_buf.getvalue(), "", _EXPORT_HIDDEN
 
-    future = _executor.submit(_run_scraper)
+    # A scrape is one long-running job; a dedicated thread is all it needs
+    scraper_thread = threading.Thread(target=_run_scraper, name="fb-scraper-run", daemon=True)
+    scraper_thread.start()
 
     # --- Stream logs while scraper runs ---
-    while True:
+    # Block on the queue while idle; only wait with a timeout when lines are
+    # buffered and still owed to the UI.
+    last_yield = time.monotonic()
+    pending = 0
+    finished = False
+    while not finished:
+        timeout = None
+        if pending:
+            timeout = max(0.0, _LOG_YIELD_INTERVAL - (time.monotonic() - last_yield))
         try:
-            msg = log_q.get(timeout=0.3)
+            batch = [log_q.get(timeout=timeout)]
         except queue.Empty:
-            # Yield current log state to keep UI alive
-            yield "\n".join(log_lines), "", gr.update(visible=False)
-            if future.done():
-                # Drain any remaining messages
-                while not log_q.empty():
-                    msg = log_q.get_nowait()
-                    if msg is None:
-                        break
-                    log_lines.append(msg)
+            batch = []
+
+        # Drain the rest of the burst without blocking
+        while True:
+            try:
+                batch.append(log_q.get_nowait())
+            except queue.Empty:
+                break
+
+        for msg in batch:
+            if msg is None:
+                # Sentinel: scraping finished
+                finished = True
                 break
-            continue
+            add_log(msg)
+            pending += 1
 
-        if msg is None:
-            # Sentinel: scraping finished
-            break
-        log_lines.append(msg)
-        yield "\n".join(log_lines), "", gr.update(visible=False)
+        now = time.monotonic()
+        if pending and (finished or pending >= _LOG_YIELD_BATCH or now - last_yield >= _LOG_YIELD_INTERVAL):
+            yield progress()
+            last_yield = now
+            pending = 0
 
     # Check for exceptions in the scraper thread
-    try:
-        future.result()
-    except Exception as e:
-        log_lines.append(f"❌ Błąd podczas scrapowania: {e}")
-        yield "\n".join(log_lines), "", gr.update(visible=False)
+    # scrape_group_threaded sends its sentinel before it returns, so the
+    # results may not be stored yet when the stream ends
+    scraper_thread.join()
+
+    if scraper_error:
+        add_log(f"❌ Błąd podczas scrapowania: {scraper_error[0]}")
+        yield progress()
         return
 
     posts = result_holder[0]
     group_name = result_holder[1]
 
     if not posts:
-        log_lines.append("⚠️ Nie znaleziono żadnych postów. Sprawdź URL grupy i dane logowania.")
-        yield "\n".join(log_lines), "", gr.update(visible=False)
+        add_log("⚠️ Nie znaleziono żadnych postów. Sprawdź URL grupy i dane logowania.")
+        yield progress()
         return
 
     # --- Analysis / Summarization ---
-    log_lines.append(f"\n📊 Przetwarzam {len(posts)} postów...")
-    yield "\n".join(log_lines), "", gr.update(visible=False)
-
-    analysis_log: list[str] = []
+    add_log(f"\n📊 Przetwarzam {len(posts)} postów...")
+    yield progress()
 
-    def analysis_log_fn(msg: str):
-        analysis_log.append(msg)
-
-    # Call the new processing function
-    
+    # Analysis runs synchronously on this thread, so it can log straight
+    # into the buffer
     try:
         summary_md, df = process_and_summarize(
             posts=posts,
             user_instructions=criteria_description or DEFAULT_CRITERIA,
             gemini_api_key=gemini_api_key,
             model=model,
-            log=analysis_log_fn,
+            log=add_log,
         )
     except Exception as e:
-        log_lines.append(f"❌ Błąd podczas analizy: {e}")
-        yield "\n".join(log_lines), "", gr.update(visible=False)
+        add_log(f"❌ Błąd podczas analizy: {e}")
+        yield progress()
         return
 
-    log_lines.extend(analysis_log)
-    yield "\n".join(log_lines), "", gr.update(visible=False)
+    yield progress()
 
     if not summary_md and df.empty:
-        log_lines.append("⚠️ Brak wyników.")
-        yield "\n".join(log_lines), "", gr.update(visible=False)
+        add_log("⚠️ Brak wyników.")
+        yield progress()
         return
     
     # --- Save Run History ---
@@ -206,31 +263,44 @@ def run_pipeline(
         # Ensure group name is set (fallback to URL slug if empty from scraper)
         final_group_name = group_name if group_name else group_url.split("/")[-1]
         save_run(final_group_name, group_url, summary_md, now_str)
-        log_lines.append("💾 Wynik zapisany w historii.")
+        add_log("💾 Wynik zapisany w historii.")
 
     # --- Export ---
     tmp_path = ""
     if not df.empty:
-        tmp = tempfile.NamedTemporaryFile(
-            delete=False, suffix=".csv", prefix="fb_scraper_results_"
-        )
-        df.to_csv(tmp.name, index=False, encoding="utf-8-sig")
+        # DownloadButton serves from a path, so the file has to exist on disk;
+        # write through the handle we already hold (and close it) instead of
+        # reopening by name and leaking the original descriptor.
+        with tempfile.NamedTemporaryFile(
+            "w", delete=False, suffix=".csv", prefix="fb_scraper_results_",
+            encoding="utf-8-sig", newline="",
+        ) as tmp:
+            df.to_csv(tmp, index=False)
         tmp_path = tmp.name
 
-    log_lines.append(f"\n🎉 Gotowe! Raport wygenerowany.")
-    yield "\n".join(log_lines), summary_md, gr.update(value=tmp_path, visible=True)
+    add_log(f"\n🎉 Gotowe! Raport wygenerowany.")
+    yield log_buf.getvalue(), summary_md, gr.update(value=tmp_path, visible=True)
+
+
+# session_status is wired to email.change, i.e. every keystroke; remember
+# the last answer briefly instead of stat()ing the session file every time.
+# Only one (email, timestamp, status) entry is kept, so typing never grows it.
+_SESSION_STATUS_TTL = 1.0
+_session_status_last: tuple[str, float, str] | None = None
 
 
 def clear_session(email: str) -> str:
     """Remove the session file for the given email."""
+    global _session_status_last
+    _session_status_last = None
     path = get_session_file_path(email)
-    if path.exists():
-        try:
-            path.unlink()
-            return "🗑️ Sesja usunięta."
-        except Exception as e:
-            return f"⚠️ Błąd usuwania: {e}"
-    return "ℹ️ Brak zapisanej sesji."
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        return "ℹ️ Brak zapisanej sesji."
+    except Exception as e:
+        return f"⚠️ Błąd usuwania: {e}"
+    return "🗑️ Sesja usunięta."
 
 
 def session_status(email: str = "") -> str:
@@ -238,7 +308,16 @@ def session_status(email: str = "") -> str:
     # If called without email (e.g. init), we might want to check env/settings?
     # But usually it's called with the input value. 
     # If email is empty, get_session_file_path returns the default/legacy path.
+    global _session_status_last
+    now = time.monotonic()
+    last = _session_status_last
+    if last is not None and last[0] == email and now - last[1] < _SESSION_STATUS_TTL:
+        return last[2]
+
     path = get_session_file_path(email)
     if path.exists():
-        return "✅ Zapisana sesja istnieje"
-    return "ℹ️ Brak zapisanej sesji"
+        status = "✅ Zapisana sesja istnieje"
+    else:
+        status = "ℹ️ Brak zapisanej sesji"
+    _session_status_last = (email, now, status)
+    return status
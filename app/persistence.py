@@ -1,8 +1,12 @@
+import atexit
+import functools
 import os
-import json
+import threading
 import time
 from pathlib import Path
 
+import orjson
+
 # ---------------------------------------------------------------------------
 # Constants
 # ---------------------------------------------------------------------------
@@ -13,6 +17,54 @@ DEFAULT_CRITERIA = (
     "z jakimi problemami mierzą się na codzień"
 )
 
+# ---------------------------------------------------------------------------
+# JSON file helpers
+# ---------------------------------------------------------------------------
+
+# Parsed file contents keyed by path, validated against st_mtime_ns so repeated
+# UI reads skip the read + parse. Writers call _invalidate() as well, in case
+# the filesystem's mtime granularity hides a quick rewrite.
+_json_cache: dict[Path, tuple[int, object]] = {}
+
+
+def _load_json_cached(path: Path, default):
+    """Return parsed JSON from path (shared cached object — do not mutate)."""
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        return default
+    hit = _json_cache.get(path)
+    if hit is not None and hit[0] == mtime:
+        return hit[1]
+    try:
+        data = orjson.loads(path.read_bytes())
+    except (OSError, orjson.JSONDecodeError):
+        return default
+    _json_cache[path] = (mtime, data)
+    return data
+
+
+def _invalidate(path: Path) -> None:
+    _json_cache.pop(path, None)
+
+
+# Serializes read-modify-write cycles; saves may run on background threads
+_write_lock = threading.RLock()
+
+
+def _atomic_write_json(path: Path, data) -> None:
+    """Write via a temp file + os.replace so readers never see a torn file."""
+    tmp = path.with_suffix(f"{path.suffix}.tmp{os.getpid()}")
+    try:
+        tmp.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        os.replace(tmp, path)
+    except BaseException:
+        # Don't leave a half-written temp file next to the real one
+        tmp.unlink(missing_ok=True)
+        raise
+    _invalidate(path)
+
+
 # ---------------------------------------------------------------------------
 # Settings persistence
 # ---------------------------------------------------------------------------
@@ -49,56 +101,82 @@ _DEFAULT_SETTINGS: dict = {
 }
 
 
+# save_settings is called by one listener on field blur / slider release /
+# toggle input / Start click, each time with the whole form. Tabbing through
+# fields or a blur immediately followed by Start still fires several saves
+# within a few ms, so updates are merged here and written once the form has
+# been quiet for _SETTINGS_FLUSH_DELAY.
+_SETTINGS_FLUSH_DELAY = 0.2
+_pending_settings: dict = {}
+_settings_timer: threading.Timer | None = None
+
+
 def load_settings() -> dict:
     """Load settings from file, falling back to defaults for missing keys."""
     defaults = dict(_DEFAULT_SETTINGS)
     # Env var fallbacks for sensitive data
     defaults["email"] = os.getenv("FB_EMAIL", "")
     
-    if not SETTINGS_FILE.exists():
-        return defaults
-    try:
-        saved = json.loads(SETTINGS_FILE.read_text(encoding="utf-8"))
-        merged = defaults
+    saved = _load_json_cached(SETTINGS_FILE, None)
+    merged = defaults
+    if isinstance(saved, dict):
         merged.update({k: v for k, v in saved.items() if k in _DEFAULT_SETTINGS})
-        if not merged["email"]:
-             merged["email"] = os.getenv("FB_EMAIL", "")
-        return merged
-    except Exception:
-        return defaults
+    # Unflushed updates win over the file
+    merged.update(_pending_settings)
+    if not merged["email"]:
+         merged["email"] = os.getenv("FB_EMAIL", "")
+    return merged
 
 
 def save_settings(**kwargs) -> None:
-    """Persist one or more settings to file. Unknown keys are ignored."""
-    current = load_settings()
-    for k, v in kwargs.items():
-        if k in _DEFAULT_SETTINGS:
-            current[k] = v
-    try:
-        SETTINGS_FILE.write_text(
-            json.dumps(current, ensure_ascii=False, indent=2), encoding="utf-8"
-        )
-    except Exception:
-        pass
+    """Persist one or more settings to file. Unknown keys are ignored.
+
+    The write is deferred briefly so bursts of updates land in a single
+    write; call flush_settings() to force it.
+    """
+    global _settings_timer
+    with _write_lock:
+        _pending_settings.update({k: v for k, v in kwargs.items() if k in _DEFAULT_SETTINGS})
+        if _settings_timer is not None:
+            _settings_timer.cancel()
+        _settings_timer = threading.Timer(_SETTINGS_FLUSH_DELAY, flush_settings)
+        _settings_timer.daemon = True
+        _settings_timer.start()
+
+
+def flush_settings() -> None:
+    """Write any pending settings updates to file now."""
+    global _settings_timer
+    with _write_lock:
+        if _settings_timer is not None:
+            _settings_timer.cancel()
+            _settings_timer = None
+        if not _pending_settings:
+            return
+        current = load_settings()
+        _pending_settings.clear()
+        try:
+            _atomic_write_json(SETTINGS_FILE, current)
+        except Exception:
+            pass
+
+
+atexit.register(flush_settings)
 
 
 def get_session_email() -> str | None:
     """Return the email associated with the saved session, or None."""
-    if not SESSION_META_FILE.exists():
-        return None
     try:
-        data = json.loads(SESSION_META_FILE.read_text(encoding="utf-8"))
-        return data.get("email")
-    except Exception:
+        data = orjson.loads(SESSION_META_FILE.read_bytes())
+    except (OSError, orjson.JSONDecodeError):
         return None
+    return data.get("email") if isinstance(data, dict) else None
 
 
 def save_session_email(email: str) -> None:
     """Save the email associated with the current session."""
     try:
-        SESSION_META_FILE.write_text(
-            json.dumps({"email": email}, indent=2), encoding="utf-8"
-        )
+        _atomic_write_json(SESSION_META_FILE, {"email": email})
     except Exception:
         pass
 
@@ -106,8 +184,7 @@ def save_session_email(email: str) -> None:
 def clear_session_metadata() -> None:
     """Remove the session metadata file."""
     try:
-        if SESSION_META_FILE.exists():
-            SESSION_META_FILE.unlink()
+        SESSION_META_FILE.unlink(missing_ok=True)
     except Exception:
         pass
 
@@ -120,39 +197,68 @@ GROUPS_HISTORY_FILE = Path("groups_history.json")
 
 
 def load_history() -> list[dict]:
-    """Return list of {name, url} dicts, newest first."""
-    if not GROUPS_HISTORY_FILE.exists():
-        return []
-    try:
-        return json.loads(GROUPS_HISTORY_FILE.read_text(encoding="utf-8"))
-    except Exception:
-        return []
+    """Return list of {name, url} dicts, newest first.
+
+    The list is the shared cached copy (returned as-is until the file
+    changes); treat it as read-only and copy it before mutating.
+    """
+    return _load_json_cached(GROUPS_HISTORY_FILE, [])
+
+
+@functools.lru_cache(maxsize=256)
+def _derive_name(url: str) -> str:
+    """Readable group name from the URL slug."""
+    slug = url.split("/groups/")[-1].split("/")[0] if "/groups/" in url else url.split("/")[-1]
+    return slug.replace("-", " ").replace("_", " ").title() or url
 
 
 def save_to_history(url: str, name: str | None = None) -> None:
-    """Prepend group to history. If name is not provided, derive from URL."""
+    """Prepend group to history. If name is not provided, keep the known
+    name for this URL or derive one from it."""
     url = url.strip().rstrip("/")
-    if not name:
-        slug = url.split("/groups/")[-1].split("/")[0] if "/groups/" in url else url.split("/")[-1]
-        name = slug.replace("-", " ").replace("_", " ").title() or url
     
+    with _write_lock:
+        history = load_history()
+        if not name:
+            # Don't replace a scraped group name with the slug-derived one
+            name = next((h["name"] for h in history if h["url"] == url), None) or _derive_name(url)
+        if history and history[0] == {"name": name, "url": url}:
+            return  # Already the newest entry, nothing to write
+        # URL-keyed dict: new entry first, older duplicates of any URL dropped
+        entries = {url: name}
+        for h in history:
+            entries.setdefault(h["url"], h["name"])
+        # Keep at most 20 entries
+        history = [{"name": n, "url": u} for u, n in entries.items()][:20]
+        _atomic_write_json(GROUPS_HISTORY_FILE, history)
+
+# Dropdown strings (and display -> URL lookup) derived from the history list
+# they were built from; rebuilt only when load_history() hands back a
+# different (re-parsed) list.
+_choices_cache: tuple[list[dict], list[str], dict[str, str]] | None = None
+
+
+def _history_choices_index() -> tuple[list[dict], list[str], dict[str, str]]:
+    global _choices_cache
     history = load_history()
-    # Remove existing entry for same URL
-    history = [h for h in history if h["url"] != url]
-    history.insert(0, {"name": name, "url": url})
-    # Keep at most 20 entries
-    history = history[:20]
-    GROUPS_HISTORY_FILE.write_text(
-        json.dumps(history, ensure_ascii=False, indent=2), encoding="utf-8"
-    )
+    if _choices_cache is None or _choices_cache[0] is not history:
+        choices = [f"{h['name']} — {h['url']}" for h in history]
+        urls = dict(zip(choices, (h["url"] for h in history)))
+        _choices_cache = (history, choices, urls)
+    return _choices_cache
+
 
 def history_choices() -> list[str]:
     """Return display strings for the dropdown."""
-    return [f"{h['name']} — {h['url']}" for h in load_history()]
+    return _history_choices_index()[1]
 
 
 def url_from_choice(choice: str) -> str:
     """Extract URL from a dropdown choice string."""
+    url = _history_choices_index()[2].get(choice)
+    if url is not None:
+        return url
+    # Not (or no longer) in history: fall back to parsing the display format
     if choice and " — " in choice:
         return choice.split(" — ", 1)[1]
     return choice
@@ -165,15 +271,18 @@ def url_from_choice(choice: str) -> str:
 PRESETS_FILE = Path("presets.json")
 
 
+def _load_all_presets() -> dict:
+    """Return the whole presets file (all keys), parsed once per file change."""
+    data = _load_json_cached(PRESETS_FILE, {})
+    return data if isinstance(data, dict) else {}
+
+
 def load_presets(key: str) -> list[str]:
-    """Return saved preset strings for a given key."""
-    if not PRESETS_FILE.exists():
-        return []
-    try:
-        data = json.loads(PRESETS_FILE.read_text(encoding="utf-8"))
-        return data.get(key, [])
-    except Exception:
-        return []
+    """Return saved preset strings for a given key.
+
+    The list is the shared cached copy; treat it as read-only.
+    """
+    return _load_all_presets().get(key, [])
 
 
 def save_preset(key: str, value: str) -> None:
@@ -181,17 +290,15 @@ def save_preset(key: str, value: str) -> None:
     value = value.strip()
     if not value:
         return
-    data: dict = {}
-    if PRESETS_FILE.exists():
-        try:
-            data = json.loads(PRESETS_FILE.read_text(encoding="utf-8"))
-        except Exception:
-            pass
-    existing = data.get(key, [])
-    existing = [v for v in existing if v != value]  # remove duplicate
-    existing.insert(0, value)
-    data[key] = existing[:15]
-    PRESETS_FILE.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    with _write_lock:
+        # Shallow copy: the cached dict must not change before the write lands
+        data = dict(_load_all_presets())
+        existing = data.get(key, [])
+        if existing and existing[0] == value:
+            return  # Already the newest preset, nothing to write
+        # dict.fromkeys keeps first occurrences in order: dedup + move to front
+        data[key] = list(dict.fromkeys([value, *existing]))[:15]
+        _atomic_write_json(PRESETS_FILE, data)
 
 
 # ---------------------------------------------------------------------------
@@ -201,24 +308,22 @@ def save_preset(key: str, value: str) -> None:
 RUNS_HISTORY_FILE = Path("runs_history.json")
 
 def load_runs() -> list[dict]:
-    """Return list of saved runs (timestamp, group_name, summary, etc)."""
-    if not RUNS_HISTORY_FILE.exists():
-        return []
-    try:
-        return json.loads(RUNS_HISTORY_FILE.read_text(encoding="utf-8"))
-    except Exception:
-        return []
+    """Return list of saved runs (timestamp, group_name, summary, etc).
+
+    The list is the shared cached copy; treat it as read-only.
+    """
+    return _load_json_cached(RUNS_HISTORY_FILE, [])
 
 def save_run(group_name: str, group_url: str, summary: str, run_date: str) -> None:
     """Save a run result."""
-    runs = load_runs()
     entry = {
         "date": run_date,
         "group_name": group_name,
         "group_url": group_url,
         "summary": summary,
     }
-    runs.insert(0, entry)
-    # Keep last 50 runs
-    runs = runs[:50]
-    RUNS_HISTORY_FILE.write_text(json.dumps(runs, ensure_ascii=False, indent=2), encoding="utf-8")
+    with _write_lock:
+        # New list: the cached one must not change before the write lands
+        # Keep last 50 runs
+        runs = [entry, *load_runs()][:50]
+        _atomic_write_json(RUNS_HISTORY_FILE, runs)
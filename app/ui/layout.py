@@ -1,3 +1,5 @@
+from pathlib import Path
+
 import gradio as gr
 from app.persistence import (
     load_settings,
@@ -5,14 +7,18 @@ from app.persistence import (
     load_presets,
     url_from_choice,
     save_settings,
-    save_to_history,
-    save_preset,
-    DEFAULT_CRITERIA,
     load_runs,
-    save_run,
-    clear_session_metadata,
 )
 
+# Stylesheet handed to demo.launch(css_paths=...); kept as a real .css file
+CSS_PATH = Path(__file__).parent / "static" / "app.css"
+
+
+def _section(title: str, spaced: bool = False) -> gr.HTML:
+    """Small uppercase heading above a group of inputs."""
+    classes = "section-title section-spaced" if spaced else "section-title"
+    return gr.HTML(f'<div class="{classes}">{title}</div>')
+
 
 def create_demo(run_pipeline_fn, clear_session_fn, session_status_fn, stop_scraper_fn):
     """
@@ -29,17 +35,13 @@ def create_demo(run_pipeline_fn, clear_session_fn, session_status_fn, stop_scrap
             <p>Znajdź najczęstsze pytania i problemy w grupach na Facebooku • Analiza po polsku</p>
         </div>
         """)
-# ... (rest of the layout code matches existing lines until end of file)
-# We need to target the end of the file for CUSTOM_JS, and the beginning for gr.Blocks.
-# Since replace_file_content is single block, I will do two calls if needed, or just one if I can match enough context?
-# Use multi_replace for safety.
 
         with gr.Tabs() as tabs:
 
             # ── Tab 1: Instrukcja + Log + Wynik ──────────────────────────────
             with gr.Tab("🚀 Start & Wyniki", id="main"):
                 
-                gr.HTML('<div class="section-title">1. Link do grupy</div>')
+                _section("1. Link do grupy")
                 with gr.Row():
                     group_url = gr.Textbox(
                         label="URL grupy",
@@ -57,7 +59,7 @@ def create_demo(run_pipeline_fn, clear_session_fn, session_status_fn, stop_scrap
 
                 with gr.Row():
                     with gr.Column(scale=3):
-                        gr.HTML('<div class="section-title">2. Instrukcje dla AI</div>')
+                        _section("2. Instrukcje dla AI")
                         criteria_description = gr.Textbox(
                             label="Co ma zawierać raport?",
                             value=_cfg["criteria_description"],
@@ -74,11 +76,11 @@ def create_demo(run_pipeline_fn, clear_session_fn, session_status_fn, stop_scrap
                         )
                     
                     with gr.Column(scale=2):
-                        gr.HTML('<div class="section-title">3. Sterowanie</div>')
+                        _section("3. Sterowanie")
                         start_btn = gr.Button("🚀 Rozpocznij Scrapowanie", variant="primary", size="lg")
                         stop_btn = gr.Button("🛑 Zatrzymaj", variant="stop")
                 
-                gr.HTML('<div class="section-title" style="margin-top: 20px;">4. Log Postępu</div>')
+                _section("4. Log Postępu", spaced=True)
                 log_output = gr.Textbox(
                     label="Logi",
                     lines=8,
@@ -87,7 +89,7 @@ def create_demo(run_pipeline_fn, clear_session_fn, session_status_fn, stop_scrap
                     autoscroll=True
                 )
 
-                gr.HTML('<div class="section-title" style="margin-top: 20px;">5. Wyniki (Markdown)</div>')
+                _section("5. Wyniki (Markdown)", spaced=True)
                 results_md = gr.Markdown(
                     label="Raport",
                     elem_classes="results-markdown",
@@ -104,49 +106,64 @@ def create_demo(run_pipeline_fn, clear_session_fn, session_status_fn, stop_scrap
                     )
 
             # ── Tab 2: Historia Wyników ──────────────────────────────────────
-            with gr.Tab("📂 Historia wyników", id="history"):
+            with gr.Tab("📂 Historia wyników", id="history") as history_tab:
                 gr.Markdown("### Ostatnie analizy")
                 
                 run_history = gr.Dataframe(
                     headers=["Data", "Grupa", "Podsumowanie"],
                     datatype=["str", "str", "str"],
+                    value=[],
                     interactive=False,
                     wrap=True,
                 )
                 
                 refresh_history_btn = gr.Button("🔄 Odśwież historię")
 
-                def get_history_df():
+                # Table rows and the runs list they were built from; load_runs()
+                # hands back the same cached list until the file changes.
+                _history_rows: list = [None, []]
+                # Runs list this browser session's table is showing
+                shown_runs = gr.State(None)
+
+                def get_history_df(shown):
                     runs = load_runs()
-                    data = []
-                    for r in runs:
-                        snippet = r.get("summary", "")[:100] + "..." if len(r.get("summary", "")) > 100 else r.get("summary", "")
-                        data.append([r.get("date", ""), r.get("group_name", ""), snippet])
-                    return data
+                    if runs is shown:
+                        # Table already shows exactly this; don't re-send it
+                        return gr.skip(), shown
+                    if _history_rows[0] is not runs:
+                        data = []
+                        for r in runs:
+                            summary = r.get("summary", "")
+                            snippet = summary[:100] + "..." if len(summary) > 100 else summary
+                            data.append([r.get("date", ""), r.get("group_name", ""), snippet])
+                        _history_rows[:] = [runs, data]
+                    return _history_rows[1], runs
 
-                gr.HTML('<div class="section-title" style="margin-top: 20px;">📜 Szczegóły wybranego raportu</div>')
+                _section("📜 Szczegóły wybranego raportu", spaced=True)
                 history_details = gr.Markdown(
                     value="Pobierz historię i kliknij w wiersz tabeli, aby zobaczyć szczegóły.",
                     elem_classes="results-markdown",
                     min_height=400
                 )
 
-                def show_details(evt: gr.SelectData):
-                    runs = load_runs()
+                def show_details(shown, evt: gr.SelectData):
+                    # Index into the runs this table was built from (no disk
+                    # access, and still right if the file changed since)
+                    runs = shown if shown is not None else load_runs()
                     if 0 <= evt.index[0] < len(runs):
                         return runs[evt.index[0]].get("summary", "")
                     return ""
 
-                refresh_history_btn.click(fn=get_history_df, outputs=run_history)
-                run_history.select(fn=show_details, outputs=history_details)
-                
-                # Load on init
-                demo.load(fn=get_history_df, outputs=run_history)
+                refresh_history_btn.click(fn=get_history_df, inputs=shown_runs, outputs=[run_history, shown_runs])
+                # Filled when the tab is opened (not on page load), which also
+                # picks up runs saved since the table was last drawn
+                history_tab.select(fn=get_history_df, inputs=shown_runs, outputs=[run_history, shown_runs])
+                run_history.select(fn=show_details, inputs=shown_runs, outputs=history_details)
 
             # ── Tab 3: Konfiguracja ──────────────────────────────────────────
             with gr.Tab("⚙️ Konfiguracja", id="config"):
                 
-                gr.HTML('<div class="section-title">🔐 Dane logowania</div>')
+                _section("🔐 Dane logowania")
                 with gr.Row():
                     email = gr.Textbox(label="E-mail", value=_cfg["email"], scale=2)
                     password = gr.Textbox(label="Hasło", type="password", scale=2)
@@ -156,7 +173,7 @@ def create_demo(run_pipeline_fn, clear_session_fn, session_status_fn, stop_scrap
                     session_status_md = gr.Markdown(value=session_status_fn(_cfg["email"]))
                     clear_session_btn = gr.Button("🗑️ Usuń sesję", size="sm", variant="secondary")
 
-                gr.HTML('<div class="section-title">🤖 Gemini API & Model</div>')
+                _section("🤖 Gemini API & Model")
                 with gr.Row():
                     gemini_api_key = gr.Textbox(
                         label="Klucz API",
@@ -172,7 +189,7 @@ def create_demo(run_pipeline_fn, clear_session_fn, session_status_fn, stop_scrap
                     )
                     headless = gr.Checkbox(label="Headless (bez okna)", value=_cfg["headless"])
 
-                gr.HTML('<div class="section-title">📈 Parametry Scrapowania</div>')
+                _section("📈 Parametry Scrapowania")
                 with gr.Row():
                     max_posts = gr.Slider(label="Max postów", minimum=20, maximum=500, value=_cfg["max_posts"], step=10)
                     scroll_wait_ms = gr.Slider(label="Scroll wait (ms)", minimum=500, maximum=5000, value=_cfg["scroll_wait_ms"], step=250)
@@ -183,104 +200,92 @@ def create_demo(run_pipeline_fn, clear_session_fn, session_status_fn, stop_scrap
 
         # ── Events ───────────────────────────────────────────────────────────────
 
-        # Config auto-save
-        def _save(key):
-            return lambda v: save_settings(**{key: v})
+        # Config auto-save: a single listener that stores every setting at
+        # once, fired when a field is committed (blur / slider release /
+        # toggle) and when a run starts, instead of once per keystroke.
+        # save_settings only records the values (the file write is
+        # debounced), so run it on the event loop, not a worker thread.
+        settings_fields = {
+            "group_url": group_url,
+            "email": email,
+            "save_session": save_session,
+            "max_posts": max_posts,
+            "criteria_description": criteria_description,
+            "gemini_api_key": gemini_api_key,
+            "headless": headless,
+            "model": model,
+            "scroll_wait_ms": scroll_wait_ms,
+            "per_post_timeout": per_post_timeout,
+            "enrich_total_timeout": enrich_total_timeout,
+        }
+
+        async def _save_all(*values):
+            save_settings(**dict(zip(settings_fields, values)))
 
-        group_url.change(fn=_save("group_url"), inputs=group_url)
-        email.change(fn=_save("email"), inputs=email)
-        save_session.change(fn=_save("save_session"), inputs=save_session)
-        max_posts.change(fn=_save("max_posts"), inputs=max_posts)
-        criteria_description.change(fn=_save("criteria_description"), inputs=criteria_description)
-        gemini_api_key.change(fn=_save("gemini_api_key"), inputs=gemini_api_key)
-        headless.change(fn=_save("headless"), inputs=headless)
-        model.change(fn=_save("model"), inputs=model)
+        gr.on(
+            triggers=[
+                group_url.blur, email.blur, criteria_description.blur, gemini_api_key.blur,
+                max_posts.release, scroll_wait_ms.release,
+                per_post_timeout.release, enrich_total_timeout.release,
+                save_session.input, headless.input, model.input,
+                start_btn.click,
+            ],
+            fn=_save_all,
+            inputs=list(settings_fields.values()),
+        )
 
         # Helpers
         history_dropdown.change(fn=url_from_choice, inputs=history_dropdown, outputs=group_url)
         criteria_preset.change(fn=lambda v: v, inputs=criteria_preset, outputs=criteria_description)
         
         clear_session_btn.click(fn=clear_session_fn, inputs=email, outputs=session_status_md)
-        email.change(fn=session_status_fn, inputs=email, outputs=session_status_md)
+        # Fires per keystroke; while one check is in flight, only the latest
+        # pending value is run
+        email.change(
+            fn=session_status_fn, inputs=email, outputs=session_status_md,
+            trigger_mode="always_last", show_progress="hidden",
+        )
 
-        # Main Pipeline
-        # Note: top_n and custom_keywords removed from UI per request (focus on prompt)
-        # We pass default/dummy values for valid pipeline signature if needed, or update signature.
-        # Let's assume pipeline is updated or we pass from persistence defaults.
-        
+        # Main Pipeline (custom keywords / top_n are not exposed in the UI;
+        # run_pipeline defaults them)
         start_btn.click(
             fn=run_pipeline_fn,
             inputs=[
                 group_url, email, password, max_posts, save_session,
                 gemini_api_key, criteria_description,
-                gr.State(""), # custom_keywords (removed)
-                gr.State(20), # top_n (removed)
                 headless,
                 scroll_wait_ms, per_post_timeout, enrich_total_timeout,
                 model,
             ],
             outputs=[log_output, results_md, export_btn],
-        ).then(
-             fn=get_history_df, outputs=run_history # Refresh history after run
+            # STOP_EVENT is process-wide, so only one scrape may run at a time
+            concurrency_limit=1,
+            concurrency_id="scraper",
         )
 
         stop_btn.click(fn=stop_scraper_fn, outputs=log_output)
-    
-    return demo
-
+        copy_btn.click(fn=None, inputs=results_md, js=COPY_REPORT_JS)
 
-CUSTOM_CSS = """
-/* ── Layout ── */
-.app-header { 
-    text-align: center; 
-    margin-bottom: 20px; 
-    padding: 20px;
-    background: linear-gradient(135deg, #1877f2 0%, #0d5dbf 100%);
-    color: white;
-    border-radius: 12px;
-}
-.app-header h1 { margin: 0; font-size: 1.8rem; }
-.section-title {
-    font-size: 0.85rem; font-weight: bold; text-transform: uppercase; color: #65676b; margin-bottom: 8px;
-}
-.log-area textarea {
-    font-family: monospace; font-size: 12px; background: #1a1a2e; color: #ddd;
-}
-.results-markdown {
-    padding: 20px; background: white; border: 1px solid #ddd; border-radius: 8px;
-}
-"""
+    # Everything except the scraper is quick; don't let it queue behind a run
+    demo.queue(default_concurrency_limit=None, max_size=32)
+    return demo
 
-CUSTOM_JS = """
-function() {
-    // Copy to clipboard functionality
-    document.addEventListener('click', (e) => {
-        const btn = e.target.closest('#copy-btn');
-        if (btn) {
-            const md = document.querySelector('.results-markdown');
-            if (md) {
-                // Get text, but also try to get the raw markdown if possible? 
-                // gr.Markdown renders HTML. getting innerText gives visible text.
-                // The user probably wants the generated markdown report.
-                // But the Markdown component renders it. 
-                // innerText is usually what people want (the report content).
-                const text = md.innerText;
-                
-                if (!navigator.clipboard) {
-                    btn.innerText = '❌ Brak dostępu do schowka';
-                    return;
-                }
 
-                navigator.clipboard.writeText(text).then(() => {
-                    const originalText = btn.innerText;
-                    btn.innerText = '✅ Skopiowano!';
-                    setTimeout(() => btn.innerText = '📋 Kopiuj do schowka', 2000);
-                }).catch(err => {
-                    console.error('Clipboard copy failed:', err);
-                    btn.innerText = '❌ Błąd';
-                });
-            }
-        }
+# Copies the report's raw markdown (the component's value, passed in as the
+# event input) rather than walking the rendered DOM for innerText.
+COPY_REPORT_JS = """
+(md) => {
+    const btn = document.getElementById('copy-btn');
+    if (!navigator.clipboard) {
+        btn.innerText = '❌ Brak dostępu do schowka';
+        return;
+    }
+    navigator.clipboard.writeText(md || '').then(() => {
+        btn.innerText = '✅ Skopiowano!';
+        setTimeout(() => btn.innerText = '📋 Kopiuj do schowka', 2000);
+    }).catch(err => {
+        console.error('Clipboard copy failed:', err);
+        btn.innerText = '❌ Błąd';
     });
 }
 """
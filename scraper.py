@@ -10,12 +10,20 @@ Key design decisions:
 """
 
 import asyncio
-import json
+import hashlib
 import queue
+import re
 from pathlib import Path
 from typing import Callable
 
+import orjson
 from playwright.async_api import async_playwright, Page, BrowserContext
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+try:  # Optional: faster event loop for the CDP traffic (not available on Windows)
+    import uvloop
+except ImportError:
+    uvloop = None
 
 # COOKIES_FILE = Path(".fb_session.json")  # Moved to arg
 
@@ -25,21 +33,37 @@ from playwright.async_api import async_playwright, Page, BrowserContext
 # ---------------------------------------------------------------------------
 
 async def _save_cookies(context: BrowserContext, file_path: Path) -> None:
-    cookies = await context.cookies()
-    file_path.write_text(json.dumps(cookies, indent=2), encoding="utf-8")
+    data = orjson.dumps(await context.cookies(), option=orjson.OPT_INDENT_2)
+    try:
+        if file_path.read_bytes() == data:
+            return  # Unchanged since the last save
+    except OSError:
+        pass
+    file_path.write_bytes(data)
 
 
 async def _load_cookies(context: BrowserContext, file_path: Path) -> bool:
     if not file_path.exists():
         return False
     try:
-        cookies = json.loads(file_path.read_text(encoding="utf-8"))
+        cookies = orjson.loads(file_path.read_bytes())
         await context.add_cookies(cookies)
         return True
     except Exception:
         return False
 
 
+# Only text is scraped; these are never needed and are the bulk of the bytes
+_BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font"})
+
+
+async def _block_heavy_resources(route) -> None:
+    if route.request.resource_type in _BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+
 async def _is_logged_in(page: Page) -> bool:
     try:
         await page.goto("https://www.facebook.com/", wait_until="domcontentloaded", timeout=20000)
@@ -55,6 +79,35 @@ async def _is_logged_in(page: Page) -> bool:
 # Login
 # ---------------------------------------------------------------------------
 
+async def _first_visible(page: Page, selectors: list[str]):
+    """Locator for the first selector (in list order) with a visible match, or None.
+
+    The count() probes run concurrently, so the whole list costs about one
+    round-trip while earlier, more specific selectors still win over later
+    generic fallbacks.
+    """
+    locators = [page.locator(f"{sel} >> visible=true").first for sel in selectors]
+    counts = await asyncio.gather(*(loc.count() for loc in locators), return_exceptions=True)
+    for loc, count in zip(locators, counts):
+        if isinstance(count, int) and count > 0:
+            return loc
+    return None
+
+
+_2FA_URL_MARKERS = ("checkpoint", "challenge", "two_step", "login/device", "login/identify", "approval")
+
+
+def _is_2fa_url(url: str) -> bool:
+    url = url.lower()
+    return any(x in url for x in _2FA_URL_MARKERS)
+
+
+def _is_home_url(url: str) -> bool:
+    """Effectively home: on facebook.com, not on a login/recover/challenge page."""
+    url = url.lower()
+    return "facebook.com" in url and not any(x in url for x in ("login", "recover", "checkpoint", "challenge"))
+
+
 async def _do_login(page: Page, email: str, password: str, log: Callable) -> bool:
     log("🔐 Navigating to Facebook login page...")
     await page.goto("https://www.facebook.com/login", wait_until="domcontentloaded", timeout=20000)
@@ -78,19 +131,12 @@ async def _do_login(page: Page, email: str, password: str, log: Callable) -> boo
         'div[role="dialog"] button:has-text("Allow")',
     ]
     
-    for selector in cookie_selectors:
+    btn = await _first_visible(page, cookie_selectors)
+    if btn is not None:
         try:
-            btn = page.locator(selector)
-            count = await btn.count()
-            if count > 0:
-                # Iterate in case there are multiple (e.g. hidden ones), try likely visible one
-                for i in range(count):
-                    if await btn.nth(i).is_visible():
-                        await btn.nth(i).click()
-                        log("🍪 Cookie consent accepted.")
-                        await page.wait_for_timeout(1000)
-                        break
-                break
+            await btn.click()
+            log("🍪 Cookie consent accepted.")
+            await page.wait_for_timeout(1000)
         except Exception:
             pass
 
@@ -111,47 +157,35 @@ async def _do_login(page: Page, email: str, password: str, log: Callable) -> boo
     ]
     
     clicked = False
-    for sel in login_btn_selectors:
+    btn = await _first_visible(page, login_btn_selectors)
+    if btn is not None:
         try:
-            if await page.locator(sel).count() > 0:
-                if await page.locator(sel).first.is_visible():
-                    await page.click(sel)
-                    clicked = True
-                    break
+            await btn.click()
+            clicked = True
         except Exception:
             pass
-            
+
     if not clicked:
         log("⚠️ Could not find explicit login button, trying Enter key...")
         await page.keyboard.press("Enter")
 
     log("⏳ Waiting for login/2FA redirect...")
     
-    # Wait for navigation or URL change
-    # Check repeatedly for 2FA indicators or success
-    two_factor_detected = False
-    
-    for _ in range(15): # Check for 15 seconds
-        await page.wait_for_timeout(1000)
-        url = page.url.lower()
-        if any(x in url for x in ["checkpoint", "challenge", "two_step", "login/device", "login/identify", "approval"]):
-            two_factor_detected = True
-            break
-        # If we are effectively home (no login/recover/challenge in URL)
-        if "facebook.com" in url and not any(x in url for x in ["login", "recover", "checkpoint", "challenge"]):
-             # Double check existence of search or feed to be sure?
-             # For now, URL check is usually enough.
-             break
+    # Wait for the URL to settle on either a 2FA/checkpoint page or home
+    try:
+        await page.wait_for_url(
+            lambda u: _is_2fa_url(u) or _is_home_url(u), wait_until="commit", timeout=15000
+        )
+    except PlaywrightTimeoutError:
+        pass
+    two_factor_detected = _is_2fa_url(page.url)
 
     if two_factor_detected:
         log("🔑 2FA/Checkpoint detected! Please approve in app or enter code. Waiting up to 90s...")
-        for _ in range(90):
-            await page.wait_for_timeout(1000)
-            url = page.url.lower()
-            if not any(x in url for x in ["checkpoint", "challenge", "two_step", "login/device", "login/identify", "approval"]):
-                log("✅ 2FA passed!")
-                break
-        else:
+        try:
+            await page.wait_for_url(lambda u: not _is_2fa_url(u), wait_until="commit", timeout=90000)
+            log("✅ 2FA passed!")
+        except PlaywrightTimeoutError:
             log("❌ 2FA timeout — could not complete login.")
             return False
 
@@ -169,6 +203,62 @@ async def _do_login(page: Page, email: str, password: str, log: Callable) -> boo
 # Post extraction
 # ---------------------------------------------------------------------------
 
+_TAG_RE = re.compile(r"<[^>]+>")
+_WS_RE = re.compile(r"\s+")
+
+
+def _clean_for_hash(t: str) -> str:
+    """Normalize post text for strict deduplication (tags, whitespace, case)."""
+    return _WS_RE.sub(" ", _TAG_RE.sub("", t)).strip().lower()
+
+
+# True once more story_message elements are in the DOM than the previous
+# _COLLECT_POSTS_JS pass returned (it yields one entry per element).
+_MORE_POSTS_JS = "n => document.querySelectorAll('[data-ad-rendering-role=\"story_message\"]').length > n"
+
+# Reads every visible post in one evaluate round-trip: [text, reactions, comments]
+# per story_message, with the engagement counts taken from the enclosing article.
+_COLLECT_POSTS_JS = r"""
+() => {
+    const toInt = (s) => {
+        let v = s.replace(/,/g, '.').replace(/\s/g, '');
+        let mult = 1;
+        if (/k/i.test(v)) { mult = 1000; v = v.replace(/k/i, ''); }
+        else if (/m/i.test(v)) { mult = 1000000; v = v.replace(/m/i, ''); }
+        const n = Math.floor(parseFloat(v) * mult);
+        return Number.isFinite(n) ? n : 0;
+    };
+    const commentRe = /(\d+[\d\s,.]*[KkMm]?)\s*(komentarz|comment)/i;
+    const reactionBtnSel = '[role="toolbar"] [role="button"][aria-label*="ka"], '
+        + '[role="toolbar"] [role="button"][aria-label*="ct"], '
+        + '[role="toolbar"] [role="button"][aria-label*="osób"], '
+        + '[role="toolbar"] [role="button"][aria-label*="people"]';
+
+    return Array.from(
+        document.querySelectorAll('[data-ad-rendering-role="story_message"]'),
+        (el) => {
+            const root = el.closest('div[role="article"]') || el;
+
+            let reactions = 0;
+            const btn = root.querySelector(reactionBtnSel);
+            if (btn) {
+                const m = (btn.getAttribute('aria-label') || '').match(/(\d+[\d\s,.]*)/);
+                if (m) reactions = parseInt(m[1].replace(/[\s,.]/g, ''), 10) || 0;
+            }
+
+            let comments = 0;
+            for (const c of root.querySelectorAll('[role="button"], [role="link"]')) {
+                const m = c.textContent.match(commentRe);
+                if (m) { comments = toInt(m[1]); break; }
+            }
+
+            return [el.innerText || '', reactions, comments];
+        },
+    );
+}
+"""
+
+
 async def _expand_see_more(post_el) -> None:
     """Click 'See more' / 'Wyświetl więcej' inside a post element."""
     for label in ["See more", "Wyświetl więcej", "Więcej", "More"]:
@@ -182,165 +272,6 @@ async def _expand_see_more(post_el) -> None:
             pass
 
 
-async def _extract_post_text(post_el) -> str:
-    """
-    Extract the main text of a post using data-ad-rendering-role="story_message".
-    Falls back to other known selectors.
-    """
-    selectors = [
-        '[data-ad-rendering-role="story_message"]',
-        '[data-ad-comet-preview="message"]',
-        '[data-ad-preview="message"]',
-    ]
-    for sel in selectors:
-        try:
-            el = post_el.locator(sel).first
-            if await el.count() > 0:
-                text = (await el.inner_text()).strip()
-                if text and len(text) > 10:
-                    return text
-        except Exception:
-            pass
-    return ""
-
-
-async def _get_handle(el):
-    """Return an ElementHandle from either a Playwright Locator or ElementHandle."""
-    # Both Locator and ElementHandle have element_handle as an attribute,
-    # so we distinguish by class name instead.
-    cls = type(el).__name__
-    if cls == "Locator":
-        return await el.element_handle()
-    # Already an ElementHandle (or JSHandle) — use directly
-    return el
-
-
-async def _extract_reactions(post_el) -> int:
-    """Extract total reaction count using JS evaluate on the element handle."""
-    try:
-        handle = await _get_handle(post_el)
-        if not handle:
-            return 0
-        count = await handle.evaluate("""el => {
-            const root = el.closest('div[role="article"]') || el;
-            
-            // Strategy 1: Look for the specific reaction count text (e.g. "123", "1.2K")
-            // usually next to the reaction icons.
-            // Selectors for the reaction/comment bar usually involve x9f619 and other obfuscated classes,
-            // so we look for the toolbar or specific aria-labels.
-            
-            // Try finding the toolbar first
-            const toolbar = root.querySelector('[role="toolbar"]');
-            if (toolbar) {
-                 // The aggregate count is often in a div or span that is a sibling or child of the toolbar items
-                 // But most reliably, it is in an aria-label of the button that opens the reaction list
-                 const reactionBtn = toolbar.querySelector('[role="button"][aria-label*="ka"], [role="button"][aria-label*="ct"], [role="button"][aria-label*="osób"], [role="button"][aria-label*="people"]');
-                 if (reactionBtn) {
-                     const label = reactionBtn.getAttribute('aria-label');
-                     const m = label.match(/(\\d+[\\d\\s,.]*)/);
-                     if (m) {
-                         // Fix 1.2K -> 1200 if necessary, but usually raw number for small counts
-                         return parseInt(m[1].replace(/[\\s,.]/g, ''), 10);
-                     }
-                 }
-            }
-
-            // Strategy 2: Broad search for numbers in the "status" checks top-left of action bar
-            // We look for the standard reaction icons container
-            const reactionIcons = root.querySelectorAll('span[role="img"][aria-label], img[role="presentation"]');
-            if (reactionIcons.length > 0) {
-                 // The count is usually in a span next to these icons
-                 // We find the container of icons and look for the text node/span next to it
-                 // This is fuzzy but often works when aria-labels fail
-                 const iconContainer = reactionIcons[0].closest('span')?.parentElement || reactionIcons[0].parentElement;
-                 if (iconContainer) {
-                     const txt = iconContainer.textContent.trim();
-                     // Look for a standalone number at the start or end
-                     const m = txt.match(/^(\\d+[\\d\\s,.]*[KkMm]?)/) || txt.match(/(\\d+[\\d\\s,.]*[KkMm]?)$/);
-                     if (m) {
-                         let valStr = m[1].replace(/,/g, '.').replace(/\\s/g, ''); # 1.2K
-                         let mult = 1;
-                         if (valStr.toLowerCase().includes('k')) { mult = 1000; valStr = valStr.replace(/[kK]/, ''); }
-                         else if (valStr.toLowerCase().includes('m')) { mult = 1000000; valStr = valStr.replace(/[mM]/, ''); }
-                         return Math.floor(parseFloat(valStr) * mult);
-                     }
-                 }
-            }
-            
-            // Strategy 3: Just find the text that looks like a reaction count (digit) not followed by "comments"
-            // This is risky but useful as fallback.
-            // We restrict to the bottom section of the article
-            const fullText = (root.innerText || root.textContent || '').trim();
-            // Look for a line that starts with a number and is likely the reactions count
-            // usually it appears before "comments" in the text dump
-            // e.g. "12\n3 comments"
-            const lines = fullText.split('\n').map(l => l.trim()).filter(l => l);
-            for (let i = lines.length - 1; i >= 0; i--) {
-                const line = lines[i];
-                // If line is just a number (possibly with K/M), and the NEXT line or nearby line is "Like" or "Comment"
-                // it is likely reactions.
-                // Or if it matches "X others" or "X people"
-                if (/^\\d+[\\d\\s,.]*[KkMm]?$/.test(line)) {
-                     // Check if it looks like a reaction count.
-                     // It should NOT be followed immediately by "comments" in the same line (handled by comment extractor)
-                     // If it's pure number, we assume reactions if we are in the footer area.
-                     // But date strings also look like numbers sometimes "2h".
-                     if (!line.match(/\\d+[hmwdys]$/)) { 
-                         let valStr = line.replace(/,/g, '.').replace(/\\s/g, '');
-                         let mult = 1;
-                         if (valStr.toLowerCase().includes('k')) { mult = 1000; valStr = valStr.replace(/[kK]/, ''); }
-                         else if (valStr.toLowerCase().includes('m')) { mult = 1000000; valStr = valStr.replace(/[mM]/, ''); }
-                         return Math.floor(parseFloat(valStr) * mult);
-                     }
-                }
-            }
-
-            return 0;
-        }""")
-        return int(count) if count else 0
-    except Exception:
-        return 0
-
-
-async def _extract_comment_count(post_el) -> int:
-    """Extract comment count using JS evaluate on the element handle."""
-    try:
-        handle = await _get_handle(post_el)
-        if not handle:
-            return 0
-        count = await handle.evaluate("""el => {
-            const root = el.closest('div[role="article"]') || el;
-            
-            // Regex for "2 comments", "16 komentarzy", "1 komentarz"
-            const commentRegex = /(\\d+[\\d\\s,.]*[KkMm]?)\\s*(komentarz|comment)/i;
-            
-            // 1. Check all elements with role="button" or "link" as they are clickable
-            const clickables = root.querySelectorAll('[role="button"], [role="link"]');
-            for (const el of clickables) {
-                const txt = el.textContent.trim();
-                const m = txt.match(commentRegex);
-                if (m) {
-                     let valStr = m[1].replace(/,/g, '.').replace(/\\s/g, '');
-                     let mult = 1;
-                     if (valStr.toLowerCase().includes('k')) { mult = 1000; valStr = valStr.replace(/[kK]/, ''); }
-                     else if (valStr.toLowerCase().includes('m')) { mult = 1000000; valStr = valStr.replace(/[mM]/, ''); }
-                     return Math.floor(parseFloat(valStr) * mult);
-                }
-            }
-            
-            // 2. Fallback: Check text content of possible status info areas
-                         return Math.floor(parseFloat(valStr) * mult);
-                     }
-                 }
-            }
-            
-            return 0;
-        }""")
-        return int(count) if count else 0
-    except Exception:
-        return 0
-
-
 # ---------------------------------------------------------------------------
 # Main async scrape function
 # ---------------------------------------------------------------------------
@@ -380,14 +311,13 @@ async def _scrape_async(
             user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
             locale="pl-PL",
         )
+        await context.route("**/*", _block_heavy_resources)
 
         # Load session if exists
         if save_session and session_file_path.exists():
-            try:
-                cookies = json.loads(session_file_path.read_text(encoding="utf-8"))
-                await context.add_cookies(cookies)
+            if await _load_cookies(context, session_file_path):
                 log("🍪 Loaded saved session, checking if still valid...")
-            except Exception:
+            else:
                 log("⚠️ Failed to load cookies, starting fresh.")
 
         page = await context.new_page()
@@ -417,8 +347,7 @@ async def _scrape_async(
                 return [], ""
 
         if save_session:
-            cookies = await context.cookies()
-            session_file_path.write_text(json.dumps(cookies, indent=2), encoding="utf-8")
+            await _save_cookies(context, session_file_path)
             log("💾 Session saved for next time.")
 
         # Navigate to group
@@ -447,7 +376,7 @@ async def _scrape_async(
                  try:
                     ld_json = await page.locator('script[type="application/ld+json"]').all_inner_texts()
                     for script in ld_json:
-                        data = json.loads(script)
+                        data = orjson.loads(script)
                         if "name" in data and ("Group" in data.get("@type", "") or "Place" in data.get("@type", "")):
                             group_name = data["name"]
                             break
@@ -464,40 +393,35 @@ async def _scrape_async(
         log(f"ℹ️ Group name: {group_name if group_name else 'Unknown'} (ID/Slug: {group_url.rstrip('/').split('/')[-1]})")
 
 
-        # Dismiss popups
-        for selector in [
+        # Dismiss popups (one at a time, in case they are stacked)
+        popup_selectors = [
             '[aria-label="Close"]',
             '[aria-label="Zamknij"]',
             'div[role="dialog"] button:has-text("Not Now")',
             'div[role="dialog"] button:has-text("Nie teraz")',
-        ]:
+        ]
+        for _ in popup_selectors:
+            btn = await _first_visible(page, popup_selectors)
+            if btn is None:
+                break
             try:
-                btn = page.locator(selector).first
-                if await btn.count() > 0:
-                    await btn.click(timeout=2000)
-                    await page.wait_for_timeout(500)
+                await btn.click(timeout=2000)
+                await page.wait_for_timeout(500)
             except Exception:
-                pass
+                break
 
         log(f"📜 Scrolling to collect {max_posts} unique posts...")
 
-        import hashlib
-        import re as _re
-
-        seen_hashes: set[str] = set()
+        seen_hashes: set[int] = set()
         posts: list[dict] = []
         
         last_height = 0
         no_new_count = 0
         scroll_round = 0
-
-        # We need a clean_text helper here for strict deduplication
-        def _clean_for_hash(t: str) -> str:
-            # Remove HTML tags (simple regex)
-            t = _re.sub(r'<[^>]+>', '', t)
-            # Remove whitespace etc
-            t = _re.sub(r'\s+', ' ', t).lower()
-            return t.strip()
+        # story_message count from the last successful collection pass; a
+        # failed evaluate keeps the previous value so the scroll wait below
+        # still waits for genuinely new posts
+        dom_count = 0
 
         # ── Fast scroll & collect ─────────────────────────────────────────────
         while len(posts) < max_posts:
@@ -506,53 +430,53 @@ async def _scrape_async(
                 break
             scroll_round += 1
 
-            # Get all story messages
-            story_messages = await page.locator('[data-ad-rendering-role="story_message"]').all()
+            # All posts currently in the DOM, in a single round-trip. "See more"
+            # is not expanded; truncated text is taken as-is, for speed.
+            try:
+                collected = await page.evaluate(_COLLECT_POSTS_JS)
+                dom_count = len(collected)
+            except Exception:
+                collected = []  # e.g. page navigated mid-evaluate; retry next round
 
             new_this_round = 0
-            for story_el in story_messages:
+            for text, reactions, comments in collected:
                 if len(posts) >= max_posts:
                     break
-                
-                try:
-                    # Expand "See more" quickly if present (optional - might be slow?)
-                    # If we don't, we get truncated text. For reliable LLM analysis, full text is better.
-                    # But user wanted speed/no enrichment phase. 
-                    # Let's try to grab text first; if it ends in "..." do we click?
-                    # For now, let's JUST grab text to be fast.
-                    
-                    text = (await story_el.inner_text()).strip()
-                    if not text: 
-                        continue
-                    
-                    # Strict deduplication
-                    norm = _clean_for_hash(text)
-                    if not norm: 
-                        continue
-
-                    h = hashlib.md5(norm.encode("utf-8")).hexdigest()
-                    if h in seen_hashes:
-                        continue
-                        
-                    seen_hashes.add(h)
-                    
-                    # Store
-                    # We create the post dict immediately.
-                    # Note: We are NOT fetching comments/reactions to save time.
-                    # User instructions: "remove enrichment part"
-                    posts.append({
-                        "text": text,
-                        "reactions": 0,
-                        "comments": 0
-                    })
-                    new_this_round += 1
-                except Exception:
+
+                text = text.strip()
+                if not text:
                     continue
 
+                # Strict deduplication
+                norm = _clean_for_hash(text)
+                if not norm:
+                    continue
+
+                # 64-bit int key: no hex string per post (same scheme as analyzer)
+                h = int.from_bytes(hashlib.blake2b(norm.encode(), digest_size=8).digest(), "little")
+                if h in seen_hashes:
+                    continue
+
+                seen_hashes.add(h)
+
+                posts.append({
+                    "text": text,
+                    "reactions": reactions,
+                    "comments": comments,
+                })
+                new_this_round += 1
+
             log(f"  → Round {scroll_round}: {new_this_round} new unique posts | Total: {len(posts)}/{max_posts}")
 
+            # Scroll, then move on as soon as more posts render; scroll_wait_ms is
+            # now the upper bound rather than a fixed sleep. Waiting on the post
+            # count rather than scrollHeight keeps loading skeletons (which grow
+            # the page before any text exists) from ending the wait early.
             await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-            await page.wait_for_timeout(scroll_wait_ms)
+            try:
+                await page.wait_for_function(_MORE_POSTS_JS, arg=dom_count, timeout=scroll_wait_ms)
+            except PlaywrightTimeoutError:
+                pass
             new_height = await page.evaluate("document.body.scrollHeight")
 
             if new_height <= last_height:
@@ -602,8 +526,11 @@ def scrape_group_threaded(
     def log(msg: str) -> None:
         log_queue.put(msg)
 
-    loop = asyncio.new_event_loop()
+    loop = uvloop.new_event_loop() if uvloop is not None else asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
+    if hasattr(asyncio, "eager_task_factory"):  # Python 3.12+
+        # Tasks that finish without suspending skip a trip through the loop
+        loop.set_task_factory(asyncio.eager_task_factory)
     try:
         try:
             result = loop.run_until_complete(
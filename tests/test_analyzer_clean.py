@@ -0,0 +1,23 @@
+import sys
+sys.path.append(".")  # Allow importing modules from root
+
+from analyzer import clean_text
+
+
+def test_clean_text_keeps_polish_diacritics():
+    assert clean_text("Zażółć gęślą jaźń") == "Zażółć gęślą jaźń"
+    assert clean_text("ŻÓŁW i Łódź") == "ŻÓŁW i Łódź"
+
+
+def test_clean_text_removes_emoji():
+    assert clean_text("Super 😀") == "Super"
+    assert clean_text("Polecam ❤️ bardzo") == "Polecam bardzo"
+    # Skin-tone modifiers and ZWJ sequences must not leave fragments behind
+    assert clean_text("Dzięki 👍🏽") == "Dzięki"
+    assert clean_text("Rodzina 👨‍👩‍👧 na wakacjach") == "Rodzina na wakacjach"
+
+
+def test_clean_text_collapses_whitespace():
+    assert clean_text("a  \n b 😀 c") == "a b c"
+    assert clean_text("  <b>Tekst</b>\r\n\tdalej  ") == "Tekst dalej"
+    assert clean_text("") == ""
@@ -0,0 +1,51 @@
+import sys
+sys.path.append(".")  # Allow importing modules from root
+
+import pytest
+from unittest.mock import patch
+
+import analyzer
+from analyzer import clean_text
+
+
+def _posts():
+    return [{"text": "Czy ktoś poleci mechanika?", "reactions": 3, "comments": 1}]
+
+
+def test_summary_cache_hit_skips_client():
+    posts = _posts()
+    texts = [clean_text(p["text"]) for p in posts]
+    prompt = analyzer._build_summary_prompt(posts, texts, "ranking")
+    system_prompt = analyzer._SYSTEM_PROMPT.format(user_instructions="ranking")
+    key = analyzer._summary_cache_key("model-x", system_prompt, prompt)
+
+    logs = []
+    with patch.dict(analyzer._SUMMARY_CACHE, {key: "cached report"}, clear=True), \
+            patch("analyzer._get_client", side_effect=AssertionError("API called")):
+        result = analyzer._call_gemini_summary(posts, texts, "ranking", "key", "model-x", logs.append)
+
+    assert result == "cached report"
+    assert any("cached" in line for line in logs)
+
+
+def test_summary_cache_reuses_previous_response():
+    pytest.importorskip("google.genai")
+
+    calls = []
+
+    class _Models:
+        def generate_content(self, **kwargs):
+            calls.append(kwargs)
+            return type("Response", (), {"text": " report "})()
+
+    client = type("Client", (), {"models": _Models()})()
+    posts = _posts()
+    texts = [clean_text(p["text"]) for p in posts]
+
+    with patch.dict(analyzer._SUMMARY_CACHE, clear=True), \
+            patch("analyzer._get_client", return_value=client):
+        first = analyzer._call_gemini_summary(posts, texts, "ranking", "key", "model-x", lambda _: None)
+        second = analyzer._call_gemini_summary(posts, texts, "ranking", "key", "model-x", lambda _: None)
+
+    assert first == second == "report"
+    assert len(calls) == 1
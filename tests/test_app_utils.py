@@ -3,6 +3,9 @@ sys.path.append(".")  # Allow importing modules from root
 
 import pytest
 import json
+import os
+import time
+import pandas as pd
 from pathlib import Path
 from unittest.mock import patch
 
@@ -49,6 +52,9 @@ def test_save_and_load_settings(tmp_path):
         
         # Save a setting
         persistence.save_settings(group_url="https://test.com", max_posts=50)
+        # Writes are debounced; pending values are visible before the flush
+        assert persistence.load_settings()["max_posts"] == 50
+        persistence.flush_settings()
         
         # Verify file content
         content = json.loads(test_file.read_text(encoding="utf-8"))
@@ -89,3 +95,138 @@ def test_history_save(tmp_path):
         history = persistence.load_history()
         assert len(history) == 2
         assert history[0]["url"] == url2  # Newest first
+
+
+_SCRAPED_POSTS = [{"text": "Czy ktoś wie?", "reactions": 1, "comments": 0}]
+
+
+def _run_pipeline_with(monkeypatch, fake_scrape):
+    """Run the whole pipeline with the given scraper fake and a stub analyzer."""
+    def fake_process(posts, user_instructions, gemini_api_key, model, log):
+        log(f"analysed {len(posts)}")
+        return "# Raport", pd.DataFrame([{"cleaned_text": p["text"], "reactions": 1, "comments": 0} for p in posts])
+
+    monkeypatch.setattr(pipeline, "scrape_group_threaded", fake_scrape)
+    monkeypatch.setattr(pipeline, "process_and_summarize", fake_process)
+
+    return list(pipeline.run_pipeline(
+        group_url="https://facebook.com/groups/my-group",
+        email="test@example.com",
+        password="secret",
+        max_posts=20,
+        save_session=False,
+        gemini_api_key="",
+        criteria_description="",
+        headless=True,
+        scroll_wait_ms=500,
+        per_post_timeout=5,
+        enrich_total_timeout=60,
+        model="gemini-2.0-flash",
+    ))
+
+
+def test_run_pipeline_streams_all_logs(tmp_path, monkeypatch):
+    # Persistence files are relative paths, so keep them out of the repo
+    monkeypatch.chdir(tmp_path)
+
+    def fake_scrape(**kwargs):
+        log_queue = kwargs["log_queue"]
+        for i in range(50):
+            log_queue.put(f"line {i}")
+        log_queue.put(None)
+        return _SCRAPED_POSTS, "My Group"
+
+    outputs = _run_pipeline_with(monkeypatch, fake_scrape)
+
+    # Bursts are coalesced, so there are far fewer UI updates than log lines
+    assert len(outputs) < 50
+    log_text, summary_md, _ = outputs[-1]
+    assert all(f"line {i}" in log_text for i in range(50))
+    assert "analysed 1" in log_text
+    assert summary_md == "# Raport"
+
+
+def test_run_pipeline_waits_for_scraper_result(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    def fake_scrape(**kwargs):
+        # Like the real scraper: sentinel first, result returned afterwards
+        kwargs["log_queue"].put(None)
+        time.sleep(0.05)
+        return _SCRAPED_POSTS, "My Group"
+
+    outputs = _run_pipeline_with(monkeypatch, fake_scrape)
+
+    log_text, summary_md, _ = outputs[-1]
+    assert "Nie znaleziono" not in log_text
+    assert "analysed 1" in log_text
+    assert summary_md == "# Raport"
+
+
+def test_presets_cache_invalidation(tmp_path):
+    test_file = tmp_path / "test_presets.json"
+
+    with patch("app.persistence.PRESETS_FILE", test_file):
+        assert persistence.load_presets("criteria") == []
+
+        persistence.save_preset("criteria", "first")
+        assert persistence.load_presets("criteria") == ["first"]
+        # Unchanged file is served from the cache
+        assert persistence.load_presets("criteria") is persistence.load_presets("criteria")
+
+        # External edits are picked up through the mtime check
+        test_file.write_text(json.dumps({"criteria": ["edited"]}), encoding="utf-8")
+        os.utime(test_file, ns=(0, test_file.stat().st_mtime_ns + 1_000_000))
+        assert persistence.load_presets("criteria") == ["edited"]
+
+
+def test_session_status_cleared_with_session(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    email = "cache@example.com"
+    persistence.get_session_file_path(email).write_text("[]", encoding="utf-8")
+
+    assert pipeline.session_status(email) == "✅ Zapisana sesja istnieje"
+    assert pipeline.clear_session(email) == "🗑️ Sesja usunięta."
+    # Clearing must not leave a stale cached "exists" answer behind
+    assert pipeline.session_status(email) == "ℹ️ Brak zapisanej sesji"
+
+
+def test_session_status_keeps_single_entry(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for i in range(50):
+        pipeline.session_status(f"user{i}@example.com")
+    # Typing an address must not accumulate one cache entry per keystroke
+    assert pipeline._session_status_last[0] == "user49@example.com"
+
+
+def test_url_from_choice_uses_history(tmp_path):
+    test_file = tmp_path / "test_history.json"
+
+    with patch("app.persistence.GROUPS_HISTORY_FILE", test_file):
+        # A name containing the separator must not confuse the lookup
+        url = "https://facebook.com/groups/123"
+        persistence.save_to_history(url, "Pytania — Odpowiedzi")
+        choice = persistence.history_choices()[0]
+        assert persistence.url_from_choice(choice) == url
+
+
+def test_history_keeps_scraped_name(tmp_path):
+    with patch("app.persistence.GROUPS_HISTORY_FILE", tmp_path / "history.json"):
+        url = "https://facebook.com/groups/123456"
+        persistence.save_to_history(url, "Real Group Name")
+        persistence.save_to_history("https://facebook.com/groups/other")
+        # Re-saving without a name moves it to the front but keeps its name
+        persistence.save_to_history(url)
+
+        history = persistence.load_history()
+        assert history[0] == {"name": "Real Group Name", "url": url}
+        assert len(history) == 2
+
+
+def test_atomic_write_cleans_up_temp_file(tmp_path):
+    target = tmp_path / "data.json"
+    with patch("app.persistence.os.replace", side_effect=OSError("disk full")):
+        with pytest.raises(OSError):
+            persistence._atomic_write_json(target, {"a": 1})
+    # Neither the target nor a stray .tmp file is left behind
+    assert list(tmp_path.iterdir()) == []